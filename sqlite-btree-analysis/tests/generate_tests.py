@@ -16,15 +16,34 @@ Usage:
 """
 
 import argparse
+import array
 import json
 import os
 import random
 import sys
 import time
 import math
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Sequence, Tuple, Optional
+from dataclasses import dataclass, field
 from collections import defaultdict
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Operation type codes for the column (op_types/op_keys) operation layout
+OPERATION_CODES = {'search': 0, 'insert': 1, 'delete': 2, 'search_missing': 3}
+OPERATION_NAMES = list(OPERATION_CODES)
+
+
+def _column(values, typecode: str):
+    """Pack ints into a numpy array, or array.array without numpy."""
+    if np is not None:
+        return np.asarray(values, dtype={'B': np.uint8, 'q': np.int64}[typecode])
+    return array.array(typecode, values)
 
 
 @dataclass
@@ -32,9 +51,21 @@ class TestCase:
     """Represents a single test case."""
     name: str
     keys: List[int]
-    operations: List[Tuple[str, int]]  # (operation_type, key)
+    op_types: 'np.ndarray | array.array'  # OPERATION_CODES values, uint8
+    op_keys: 'np.ndarray | array.array'   # int64
     expected_results: Dict[str, any]
 
+    def __post_init__(self):
+        # Accept any int sequence (e.g. plain lists); store packed columns
+        self.op_types = _column(self.op_types, 'B')
+        self.op_keys = _column(self.op_keys, 'q')
+
+    @property
+    def operations(self) -> List[Tuple[str, int]]:
+        """Operations as (operation_type, key) tuples."""
+        return [(OPERATION_NAMES[t], k)
+                for t, k in zip(self.op_types.tolist(), self.op_keys.tolist())]
+
 
 @dataclass
 class BenchmarkResult:
@@ -49,6 +80,24 @@ class BenchmarkResult:
     avg_comparisons: float
     avg_node_visits: float
     fill_factor: float
+    # Derived from the name once at parse time
+    category: str = field(init=False, default='other')  # btree, order, linear, other
+    is_scaling: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        if 'Linear' in self.name:
+            self.category = 'linear'
+        elif self.name.startswith('Order='):
+            self.category = 'order'
+        elif 'B-tree' in self.name or 'Order=' in self.name:
+            self.category = 'btree'
+        self.is_scaling = 'n=' in self.name
+
+
+def _unique_in_order(arr):
+    """Drop duplicates from a numpy array, keeping first-drawn order."""
+    _, first = np.unique(arr, return_index=True)
+    return arr[np.sort(first)]
 
 
 class TestDataGenerator:
@@ -58,6 +107,8 @@ class TestDataGenerator:
         """Initialize with a random seed for reproducibility."""
         self.seed = seed
         random.seed(seed)
+        # Vectorized generator; falls back to the random module without numpy
+        self.rng = np.random.default_rng(seed) if np is not None else None
 
     def generate_sequential_keys(self, count: int, start: int = 1) -> List[int]:
         """Generate sequential keys."""
@@ -66,15 +117,33 @@ class TestDataGenerator:
     def generate_random_keys(self, count: int, min_val: int = 1,
                             max_val: int = 10**9) -> List[int]:
         """Generate unique random keys."""
-        keys = set()
-        while len(keys) < count:
-            keys.add(random.randint(min_val, max_val))
-        return list(keys)
+        if self.rng is not None:
+            # Draw in one batch, dedupe, and top up on collisions with
+            # doubling batches so dense ranges still finish in a few rounds
+            arr = _unique_in_order(
+                self.rng.integers(min_val, max_val + 1, size=count, dtype=np.int64)
+            )
+            batch = 2 * max(1024, count - len(arr))
+            while len(arr) < count:
+                extra = self.rng.integers(min_val, max_val + 1, size=batch, dtype=np.int64)
+                arr = _unique_in_order(np.concatenate((arr, extra)))
+                batch *= 2
+            return arr[:count].tolist()
+
+        # Sampling without replacement never collides
+        return random.sample(range(min_val, max_val + 1), count)
 
     def generate_skewed_keys(self, count: int, skew_factor: float = 0.8) -> List[int]:
         """Generate keys with Zipfian-like distribution."""
-        keys = []
         max_val = count * 10
+        if self.rng is not None:
+            u = self.rng.random(count)
+            hot = self.rng.integers(1, count // 10 + 1, size=count)
+            cold = self.rng.integers(count // 10, max_val + 1, size=count)
+            keys = np.where(u < skew_factor, hot, cold)
+            return _unique_in_order(keys)[:count].tolist()
+
+        keys = []
         for _ in range(count):
             if random.random() < skew_factor:
                 # Hot keys (small range)
@@ -88,20 +157,60 @@ class TestDataGenerator:
                            search_ratio: float = 0.7,
                            insert_ratio: float = 0.2,
                            delete_ratio: float = 0.1,
-                           count: int = 10000) -> List[Tuple[str, int]]:
-        """Generate mixed operations with specified ratios."""
-        operations = []
+                           count: int = 10000) -> Tuple[Sequence[int], Sequence[int]]:
+        """Generate mixed operations with specified ratios.
+
+        Returns (op_types, op_keys) columns; op types use OPERATION_CODES.
+        """
+        if self.rng is not None:
+            keys_arr = np.asarray(keys, dtype=np.int64)
+            r = self.rng.random(count)
+            picked = self.rng.choice(keys_arr, size=count)
+            new_keys = self.rng.integers(1, int(keys_arr.max()) * 2 + 1, size=count)
+            op_types = np.where(r < search_ratio, OPERATION_CODES['search'],
+                                np.where(r < search_ratio + insert_ratio,
+                                         OPERATION_CODES['insert'],
+                                         OPERATION_CODES['delete'])).astype(np.uint8)
+            op_keys = np.where(op_types == OPERATION_CODES['insert'], new_keys, picked)
+            return op_types, op_keys.astype(np.int64)
+
+        op_types = array.array('B')
+        op_keys = array.array('q')
+        max_new_key = max(keys) * 2
+        insert_cutoff = search_ratio + insert_ratio
+        search, insert, delete = (OPERATION_CODES[op] for op in ('search', 'insert', 'delete'))
+
+        # Local bindings keep attribute lookups out of the hot loop
+        keys_t = tuple(keys)
+        n_keys = len(keys_t)
+        rand, randrange, randint = random.random, random.randrange, random.randint
+        add_type, add_key = op_types.append, op_keys.append
         for _ in range(count):
-            r = random.random()
-            key = random.choice(keys)
+            r = rand()
+            key = keys_t[randrange(n_keys)]
             if r < search_ratio:
-                operations.append(('search', key))
-            elif r < search_ratio + insert_ratio:
-                new_key = random.randint(1, max(keys) * 2)
-                operations.append(('insert', new_key))
+                add_type(search)
+                add_key(key)
+            elif r < insert_cutoff:
+                add_type(insert)
+                add_key(randint(1, max_new_key))
             else:
-                operations.append(('delete', key))
-        return operations
+                add_type(delete)
+                add_key(key)
+        return op_types, op_keys
+
+
+@lru_cache(maxsize=None)
+def _log_order(order: int) -> float:
+    """Natural log of a B-tree order, memoized per order."""
+    return math.log(order)
+
+
+@lru_cache(maxsize=None)
+def _comparisons_per_node(order: int) -> float:
+    """Binary search comparisons within one node: log2(keys_per_node)."""
+    keys_per_node = order - 1
+    return math.log2(keys_per_node) if keys_per_node > 1 else 1
 
 
 class TestCaseBuilder:
@@ -115,33 +224,42 @@ class TestCaseBuilder:
         if n == 0:
             return 0
         # height = ceil(log_order(n))
-        return max(1, math.ceil(math.log(n + 1) / math.log(order)))
+        return max(1, math.ceil(math.log1p(n) / _log_order(order)))
 
     def calculate_expected_comparisons(self, n: int, order: int) -> float:
         """Calculate expected comparisons per search."""
         height = self.calculate_expected_height(n, order)
-        # Binary search within each node: log2(keys_per_node)
-        keys_per_node = order - 1
-        comparisons_per_node = math.log2(keys_per_node) if keys_per_node > 1 else 1
-        return height * comparisons_per_node
+        return height * _comparisons_per_node(order)
 
     def build_scaling_test(self, sizes: List[int], order: int = 128) -> List[TestCase]:
         """Build test cases for scaling analysis."""
+        # Order is fixed across sizes: compute all expected heights at once
+        if np is not None:
+            sizes_arr = np.asarray(sizes, dtype=np.float64)
+            heights = np.where(
+                sizes_arr == 0, 0,
+                np.maximum(1, np.ceil(np.log1p(sizes_arr) / _log_order(order)))
+            ).astype(int).tolist()
+        else:
+            heights = [self.calculate_expected_height(size, order) for size in sizes]
+        per_node = _comparisons_per_node(order)
+
         test_cases = []
-        for size in sizes:
+        for size, height in zip(sizes, heights):
             keys = self.generator.generate_random_keys(size)
-            operations = self.generator.generate_operations(keys, count=min(10000, size))
+            op_types, op_keys = self.generator.generate_operations(keys, count=min(10000, size))
 
             expected = {
-                'height': self.calculate_expected_height(size, order),
-                'avg_comparisons_upper_bound': self.calculate_expected_comparisons(size, order) * 1.5,
+                'height': height,
+                'avg_comparisons_upper_bound': height * per_node * 1.5,
                 'search_complexity': 'O(log n)',
             }
 
             test_case = TestCase(
                 name=f"scaling_test_{size}",
                 keys=keys,
-                operations=operations,
+                op_types=op_types,
+                op_keys=op_keys,
                 expected_results=expected
             )
             test_cases.append(test_case)
@@ -153,16 +271,13 @@ class TestCaseBuilder:
         keys = self.generator.generate_sequential_keys(size)
         random.shuffle(keys)
 
-        operations = []
-        # Insert all keys
-        for key in keys:
-            operations.append(('insert', key))
-        # Search for all keys (should all succeed)
-        for key in keys:
-            operations.append(('search', key))
-        # Search for non-existent keys
-        for i in range(100):
-            operations.append(('search_missing', size + i + 1))
+        # Insert all keys, search for all keys (should all succeed),
+        # then search for non-existent keys
+        missing = range(size + 1, size + 101)
+        op_types = _column([OPERATION_CODES['insert']] * size
+                           + [OPERATION_CODES['search']] * size
+                           + [OPERATION_CODES['search_missing']] * len(missing), 'B')
+        op_keys = _column(keys + keys + list(missing), 'q')
 
         expected = {
             'all_inserts_succeed': True,
@@ -173,7 +288,8 @@ class TestCaseBuilder:
         return TestCase(
             name="correctness_test",
             keys=keys,
-            operations=operations,
+            op_types=op_types,
+            op_keys=op_keys,
             expected_results=expected
         )
 
@@ -187,28 +303,31 @@ class BenchmarkAnalyzer:
     def parse_results_file(self, filepath: str) -> None:
         """Parse benchmark output file."""
         with open(filepath, 'r') as f:
-            lines = f.readlines()
-
-        for line in lines:
-            if '|' in line and not line.startswith('-'):
-                parts = [p.strip() for p in line.split('|')]
-                if len(parts) >= 10 and parts[0] and not parts[0].startswith('Benchmark'):
-                    try:
-                        result = BenchmarkResult(
-                            name=parts[0],
-                            records=int(parts[1]) if parts[1].isdigit() else 0,
-                            order=int(parts[2]) if parts[2].isdigit() else 0,
-                            insert_time_ms=float(parts[3]) if parts[3].replace('.', '').isdigit() else 0,
-                            insert_ops_per_sec=float(parts[4]) if parts[4].replace('.', '').isdigit() else 0,
-                            search_ops_per_sec=float(parts[5]) if parts[5].replace('.', '').isdigit() else 0,
-                            height=int(parts[6]) if parts[6].isdigit() else 0,
-                            avg_comparisons=float(parts[7]) if parts[7].replace('.', '').isdigit() else 0,
-                            avg_node_visits=float(parts[8]) if parts[8].replace('.', '').isdigit() else 0,
-                            fill_factor=float(parts[9].rstrip('%')) / 100 if '%' in parts[9] else 0,
-                        )
-                        self.results.append(result)
-                    except (ValueError, IndexError):
-                        continue
+            for line in f:
+                if '|' not in line or line.startswith(('-', 'Benchmark')):
+                    continue
+                parts = line.split('|', 9)
+                if len(parts) < 10:
+                    continue
+                name = parts[0].strip()
+                if not name:
+                    continue
+                try:
+                    result = BenchmarkResult(
+                        name=name,
+                        records=int(parts[1]),
+                        order=int(parts[2]),
+                        insert_time_ms=float(parts[3]),
+                        insert_ops_per_sec=float(parts[4]),
+                        search_ops_per_sec=float(parts[5]),
+                        height=int(parts[6]),
+                        avg_comparisons=float(parts[7]),
+                        avg_node_visits=float(parts[8]),
+                        fill_factor=float(parts[9].strip().rstrip('%')) / 100,
+                    )
+                except ValueError:
+                    continue
+                self.results.append(result)
 
     def generate_analysis_report(self) -> str:
         """Generate analysis report."""
@@ -221,17 +340,24 @@ class BenchmarkAnalyzer:
         report.append("=" * 60)
         report.append("")
 
-        # Group by test type
-        btree_results = [r for r in self.results if 'B-tree' in r.name or 'Order=' in r.name]
-        linear_results = [r for r in self.results if 'Linear' in r.name]
+        # Group by test type in a single pass
+        btree_results, linear_results, scaling_results, order_results = [], [], [], []
+        for r in self.results:
+            if r.category == 'linear':
+                linear_results.append(r)
+            elif r.category in ('btree', 'order'):
+                btree_results.append(r)
+                if r.is_scaling:
+                    scaling_results.append(r)
+                if r.category == 'order':
+                    order_results.append(r)
 
         # Scaling analysis
-        scaling_results = [r for r in btree_results if 'n=' in r.name]
         if scaling_results:
             report.append("SCALING ANALYSIS")
             report.append("-" * 40)
             for r in scaling_results:
-                theoretical_height = math.ceil(math.log(r.records + 1) / math.log(r.order)) if r.order > 1 else 0
+                theoretical_height = math.ceil(math.log1p(r.records) / _log_order(r.order)) if r.order > 1 else 0
                 report.append(f"Records: {r.records:,}")
                 report.append(f"  Actual Height: {r.height}, Theoretical: {theoretical_height}")
                 report.append(f"  Search throughput: {r.search_ops_per_sec:,.0f} ops/sec")
@@ -257,7 +383,6 @@ class BenchmarkAnalyzer:
                     report.append("")
 
         # Order comparison
-        order_results = [r for r in btree_results if r.name.startswith('Order=')]
         if order_results:
             report.append("ORDER (FANOUT) COMPARISON")
             report.append("-" * 40)
@@ -276,7 +401,7 @@ class BenchmarkAnalyzer:
 
     def validate_complexity(self) -> Dict[str, bool]:
         """Validate that B-tree operations exhibit O(log n) complexity."""
-        btree_results = [r for r in self.results if 'B-tree' in r.name and 'n=' in r.name]
+        btree_results = [r for r in self.results if r.category == 'btree' and r.is_scaling]
         if len(btree_results) < 2:
             return {'valid': False, 'reason': 'Insufficient data points'}
 
@@ -287,17 +412,30 @@ class BenchmarkAnalyzer:
         # For O(log n), doubling n should add a constant to comparisons
         validations = {}
 
-        for i in range(1, len(btree_results)):
-            prev = btree_results[i - 1]
-            curr = btree_results[i]
-
-            if prev.records > 0 and curr.records > 0:
-                size_ratio = curr.records / prev.records
-                comp_ratio = curr.avg_comparisons / prev.avg_comparisons if prev.avg_comparisons > 0 else 0
-
-                # For log n growth, comp_ratio should be much smaller than size_ratio
-                is_logarithmic = comp_ratio < math.sqrt(size_ratio) if size_ratio > 1 else True
-                validations[f'{prev.records}->{curr.records}'] = is_logarithmic
+        # Pairwise ratios between consecutive sizes
+        if np is not None:
+            records = np.array([r.records for r in btree_results], dtype=np.float64)
+            comps = np.array([r.avg_comparisons for r in btree_results], dtype=np.float64)
+            prev_comps = comps[:-1]
+            measured = (records[:-1] > 0) & (records[1:] > 0)
+            size_r = records[1:] / np.where(records[:-1] > 0, records[:-1], 1)
+            comp_r = np.where(prev_comps > 0,
+                              comps[1:] / np.where(prev_comps > 0, prev_comps, 1), 0)
+
+            # For log n growth, comp_ratio should be much smaller than size_ratio
+            is_logarithmic = (size_r <= 1) | (comp_r < np.sqrt(size_r))
+            for prev, curr, ok, valid in zip(btree_results, btree_results[1:],
+                                             measured.tolist(), is_logarithmic.tolist()):
+                if ok:
+                    validations[f'{prev.records}->{curr.records}'] = valid
+        else:
+            for prev, curr in zip(btree_results, btree_results[1:]):
+                if prev.records > 0 and curr.records > 0:
+                    size_ratio = curr.records / prev.records
+                    comp_ratio = curr.avg_comparisons / prev.avg_comparisons if prev.avg_comparisons > 0 else 0
+
+                    is_logarithmic = comp_ratio < math.sqrt(size_ratio) if size_ratio > 1 else True
+                    validations[f'{prev.records}->{curr.records}'] = is_logarithmic
 
         all_valid = all(validations.values())
         return {
@@ -308,20 +446,40 @@ class BenchmarkAnalyzer:
         }
 
 
-def save_test_data(test_cases: List[TestCase], output_dir: str) -> None:
-    """Save test cases to JSON files."""
+def save_test_data(test_cases: List[TestCase], output_dir: str,
+                   fmt: str = 'json') -> None:
+    """Save test cases to JSON files, or to .npz arrays with a JSON sidecar."""
     os.makedirs(output_dir, exist_ok=True)
 
     for tc in test_cases:
-        filepath = os.path.join(output_dir, f"{tc.name}.json")
-        data = {
-            'name': tc.name,
-            'keys': tc.keys,
-            'operations': tc.operations,
-            'expected_results': tc.expected_results
-        }
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        if fmt == 'npz':
+            # Column layout: keys, op_types (uint8 codes) and op_keys as
+            # separate int arrays; expected results stay human-readable
+            filepath = os.path.join(output_dir, f"{tc.name}.npz")
+            np.savez(
+                filepath,
+                keys=np.asarray(tc.keys, dtype=np.int64),
+                op_types=np.asarray(tc.op_types, dtype=np.uint8),
+                op_keys=np.asarray(tc.op_keys, dtype=np.int64),
+            )
+            meta = {
+                'name': tc.name,
+                'operation_codes': OPERATION_CODES,
+                'expected_results': tc.expected_results
+            }
+            with open(os.path.join(output_dir, f"{tc.name}.expected.json"), 'w') as f:
+                json.dump(meta, f, indent=2)
+        else:
+            filepath = os.path.join(output_dir, f"{tc.name}.json")
+            data = {
+                'name': tc.name,
+                'keys': tc.keys,
+                'operations': tc.operations,
+                'expected_results': tc.expected_results
+            }
+            # Compact separators: the key/operation arrays dominate file size
+            with open(filepath, 'w', buffering=1 << 20) as f:
+                json.dump(data, f, separators=(',', ':'))
         print(f"Saved: {filepath}")
 
 
@@ -337,6 +495,9 @@ def main():
                        help='Output directory for test data')
     parser.add_argument('--seed', type=int, default=42,
                        help='Random seed for reproducibility')
+    parser.add_argument('--format', choices=['json', 'npz'],
+                       default='npz' if np is not None else 'json',
+                       help='Test data format (default: npz when numpy is available)')
     parser.add_argument('--validate', type=str, metavar='FILE',
                        help='Validate benchmark results against expected complexity')
 
@@ -387,7 +548,10 @@ def main():
         test_cases.append(builder.build_correctness_test(size=1000))
 
         # Save test data
-        save_test_data(test_cases, args.output)
+        if args.format == 'npz' and np is None:
+            print("Note: numpy not installed, writing JSON test data")
+            args.format = 'json'
+        save_test_data(test_cases, args.output, fmt=args.format)
 
         print(f"\nGenerated {len(test_cases)} test cases.")
         print(f"Test data saved to: {args.output}/")
@@ -398,7 +562,7 @@ def main():
         for tc in test_cases:
             print(f"  {tc.name}:")
             print(f"    Keys: {len(tc.keys)}")
-            print(f"    Operations: {len(tc.operations)}")
+            print(f"    Operations: {len(tc.op_types)}")
             print(f"    Expected height: {tc.expected_results.get('height', 'N/A')}")
 
 
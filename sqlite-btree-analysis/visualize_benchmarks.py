@@ -6,12 +6,25 @@ Generates charts showing:
 1. B-tree vs Linear search comparison (comparisons)
 2. Scaling analysis (height and comparisons vs data size)
 3. Order comparison
+
+Usage:
+    python3 visualize_benchmarks.py              # Combined results figure
+    python3 visualize_benchmarks.py --summary    # Also the B-tree vs Linear chart
 """
 
+import argparse
+
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+parser = argparse.ArgumentParser(description='B-Tree Benchmark Visualization')
+parser.add_argument('--summary', action='store_true',
+                    help='Also render the standalone B-tree vs Linear chart')
+parser.add_argument('--dpi', type=int, default=100,
+                    help='Output resolution (default: 100; use 150+ for print)')
+args = parser.parse_args()
+
 # Create output directory
 os.makedirs('assets', exist_ok=True)
 
@@ -46,26 +59,35 @@ order_data = {
     'search_ops': [3300839, 3972537, 4956035, 5705004, 5983413, 6759625, 6941779, 6936949],
 }
 
+
+def _bar_btree_vs_linear(ax, data, labels, colors, linewidth=None):
+    """Draw grouped B-tree vs Linear comparison bars on a log axis."""
+    x = np.arange(len(data['sizes']))
+    width = 0.35
+
+    bars1 = ax.bar(x - width/2, data['btree_comparisons'], width,
+                   label=labels[0], color=colors[0], edgecolor='black', linewidth=linewidth)
+    bars2 = ax.bar(x + width/2, data['linear_comparisons'], width,
+                   label=labels[1], color=colors[1], edgecolor='black', linewidth=linewidth)
+
+    ax.set_xticks(x)
+    ax.set_xticklabels([f'{s:,}' for s in data['sizes']])
+    ax.set_yscale('log')
+    ax.legend()
+    return bars1, bars2
+
+
 # Create figure with subplots
 fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
 # ============== Plot 1: B-tree vs Linear Comparisons ==============
 ax1 = axes[0, 0]
-x = np.arange(len(btree_linear_data['sizes']))
-width = 0.35
-
-bars1 = ax1.bar(x - width/2, btree_linear_data['btree_comparisons'], width,
-                label='B-tree', color='#2ecc71', edgecolor='black', linewidth=0.5)
-bars2 = ax1.bar(x + width/2, btree_linear_data['linear_comparisons'], width,
-                label='Linear', color='#e74c3c', edgecolor='black', linewidth=0.5)
+bars1, bars2 = _bar_btree_vs_linear(ax1, btree_linear_data, ('B-tree', 'Linear'),
+                                    ('#2ecc71', '#e74c3c'), linewidth=0.5)
 
 ax1.set_xlabel('Dataset Size')
 ax1.set_ylabel('Average Comparisons per Search')
 ax1.set_title('B-tree vs Linear Search: Comparisons\n(Lower is Better)', fontweight='bold')
-ax1.set_xticks(x)
-ax1.set_xticklabels([f'{s:,}' for s in btree_linear_data['sizes']])
-ax1.legend()
-ax1.set_yscale('log')
 
 # Add value labels on bars
 for bar in bars1:
@@ -172,43 +194,32 @@ plt.suptitle('SQLite B-tree Indexing Performance Analysis', fontsize=14, fontwei
 
 # Save figure
 output_path = 'assets/btree_benchmark_results.png'
-plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
+plt.savefig(output_path, dpi=args.dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
 print(f"Saved visualization to: {output_path}")
 
-# Also create a simpler summary chart
-fig2, ax = plt.subplots(figsize=(10, 6))
-
-# Comparison reduction visualization
-sizes = btree_linear_data['sizes']
-btree_comps = btree_linear_data['btree_comparisons']
-linear_comps = btree_linear_data['linear_comparisons']
-
-x = np.arange(len(sizes))
-width = 0.35
-
-bars1 = ax.bar(x - width/2, btree_comps, width, label='B-tree (O(log N))',
-               color='#27ae60', edgecolor='black')
-bars2 = ax.bar(x + width/2, linear_comps, width, label='Linear Scan (O(N))',
-               color='#c0392b', edgecolor='black')
-
-ax.set_ylabel('Comparisons per Search (log scale)')
-ax.set_xlabel('Number of Records')
-ax.set_title('B-tree vs Linear Search: Why Indexes Matter', fontsize=14, fontweight='bold')
-ax.set_xticks(x)
-ax.set_xticklabels([f'{s:,}' for s in sizes])
-ax.set_yscale('log')
-ax.legend()
-
-# Add speedup annotations
-for i, (b, l) in enumerate(zip(btree_comps, linear_comps)):
-    speedup = l / b
-    ax.annotate(f'{speedup:.0f}x\nfaster',
-                xy=(i, max(b, l) * 1.5),
-                ha='center', fontsize=9, fontweight='bold', color='#2c3e50')
-
-plt.tight_layout()
-output_path2 = 'assets/btree_vs_linear.png'
-plt.savefig(output_path2, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
-print(f"Saved visualization to: {output_path2}")
+if args.summary:
+    # Also create a simpler summary chart
+    fig2, ax = plt.subplots(figsize=(10, 6))
+
+    # Comparison reduction visualization
+    _bar_btree_vs_linear(ax, btree_linear_data, ('B-tree (O(log N))', 'Linear Scan (O(N))'),
+                         ('#27ae60', '#c0392b'))
+
+    ax.set_ylabel('Comparisons per Search (log scale)')
+    ax.set_xlabel('Number of Records')
+    ax.set_title('B-tree vs Linear Search: Why Indexes Matter', fontsize=14, fontweight='bold')
+
+    # Add speedup annotations
+    for i, (b, l) in enumerate(zip(btree_linear_data['btree_comparisons'],
+                                   btree_linear_data['linear_comparisons'])):
+        speedup = l / b
+        ax.annotate(f'{speedup:.0f}x\nfaster',
+                    xy=(i, max(b, l) * 1.5),
+                    ha='center', fontsize=9, fontweight='bold', color='#2c3e50')
+
+    plt.tight_layout()
+    output_path2 = 'assets/btree_vs_linear.png'
+    plt.savefig(output_path2, dpi=args.dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
+    print(f"Saved visualization to: {output_path2}")
 
 print("\nVisualization complete!")
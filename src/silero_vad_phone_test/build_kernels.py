@@ -0,0 +1,40 @@
+"""Ahead-of-time compile the degradation kernels with numba.pycc.
+
+Builds a ``phone_kernels`` extension module next to this file so the
+real-time path does not pay JIT compilation on its first audio chunk:
+
+    python -m silero_vad_phone_test.build_kernels
+
+The module also exports ``abi_version()``, returning the
+``kernels.KERNEL_ABI`` it was built from; ``phone_simulator`` only uses a
+module whose version matches, so a stale build falls back to the JIT.
+"""
+
+import os
+
+from numba.pycc import CC
+
+from . import kernels
+from .kernels import KERNEL_ABI
+
+
+def abi_version():
+    return KERNEL_ABI  # frozen into the module at compile time
+
+
+def main():
+    """Compile the phone_kernels extension module."""
+    cc = CC('phone_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export('abi_version', 'i8()')(abi_version)
+    cc.export('postprocess', 'f4[:](f4[:], i8, f4, f4[:], i8[:])')(kernels.postprocess)
+    cc.export(
+        'degrade_pcm',
+        'f4[:](i2[:], f4[:, :], f4[:, :], f4[:], f4[:], i8[:], i8, f4, f4[:], i8[:], f4[:], f4[:])'
+    )(kernels.degrade_pcm)
+    cc.compile()
+    print(f"Built phone_kernels in {cc.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
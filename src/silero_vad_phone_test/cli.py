@@ -2,6 +2,9 @@
 
 import argparse
 
+import numpy as np
+
+from .onnx_model import PREFERRED_PROVIDERS, model_input_dtype
 from .streaming_vad import AudioConfig, StreamingVADTester
 
 
@@ -36,20 +39,50 @@ def main():
         help='Target sample rate (default: 8000 for phone quality)'
     )
 
+    parser.add_argument(
+        '--max-batch', type=int, default=2,
+        help='Max queued chunks processed per pass when behind (default: 2)'
+    )
+
+    parser.add_argument(
+        '--gate-db', type=float, default=None,
+        help='Skip most model calls on chunks below this level in dBFS while '
+             'no speech is active, e.g. -50 (default: off)'
+    )
+
+    parser.add_argument(
+        '--model', default=None,
+        help='ONNX model path, e.g. from vad-quantize (default: bundled Silero model)'
+    )
+
+    parser.add_argument(
+        '--cpu', action='store_true',
+        help='Run the model on CPUExecutionProvider only (default: best available)'
+    )
+
     args = parser.parse_args()
+    if args.max_batch < 1:
+        parser.error("--max-batch must be at least 1")
+    # int16-input models read raw PCM, which the phone simulation never produces
+    if (args.model and not args.no_degrade
+            and model_input_dtype(args.model) == np.int16):
+        parser.error("--model takes int16 PCM input; run it with --no-degrade")
 
-    config = AudioConfig(output_rate=args.sample_rate)
+    config = AudioConfig(output_rate=args.sample_rate, max_batch=args.max_batch)
 
     vad_params = {
         'threshold': args.threshold,
         'min_silence_duration_ms': args.silence_ms,
         'speech_pad_ms': args.pad_ms,
+        'gate_db': args.gate_db,
     }
 
     tester = StreamingVADTester(
         config=config,
         vad_params=vad_params,
-        degrade_audio=not args.no_degrade
+        degrade_audio=not args.no_degrade,
+        model_path=args.model,
+        providers=('CPUExecutionProvider',) if args.cpu else PREFERRED_PROVIDERS
     )
 
     tester.run(device_index=args.device)
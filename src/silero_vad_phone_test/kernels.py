@@ -0,0 +1,84 @@
+"""Numba kernels for phone audio degradation.
+
+Plain Python source shared by the JIT path (``numba.njit`` in
+``phone_simulator``) and the ahead-of-time build (``build_kernels``).
+Nothing here imports numba, so the functions also run uncompiled.
+"""
+
+import numpy as np
+
+# Bump whenever a kernel signature changes: phone_kernels built for another
+# version is ignored in favour of the numba JIT (see build_kernels)
+KERNEL_ABI = 3
+SOFT_CLIP_LIMIT = 3.0    # Rational tanh approximation reaches exactly +/-1 here
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def postprocess(x, ratio, gain, noise, noise_pos):
+    """Downsample, add line noise and compress in a single pass.
+
+    Noise is read from the ``noise`` ring starting at ``noise_pos[0]``,
+    which is advanced in place.
+    """
+    n = (x.shape[0] + ratio - 1) // ratio
+    out = np.empty(n, np.float32)
+    j = noise_pos[0]
+    for i in range(n):
+        v = (x[i * ratio] + noise[j]) * gain
+        j += 1
+        if j == noise.shape[0]:
+            j = 0
+        v = min(max(v, -SOFT_CLIP_LIMIT), SOFT_CLIP_LIMIT)
+        v2 = v * v
+        out[i] = v * (27.0 + v2) / (27.0 + 9.0 * v2) / gain
+    noise_pos[0] = j
+    return out
+
+
+def degrade_pcm(pcm, sos, zi, fir, fir_hist, phase, ratio, gain, noise, noise_pos,
+                work, out):
+    """int16 PCM to degraded float32 phone audio in one pass.
+
+    Scales to [-1, 1], runs the SOS cascade (``zi``: sosfilt's state),
+    decimates through ``fir`` and applies noise (from the ``noise`` ring)
+    and compression. ``zi``, ``fir_hist`` (the last filtered samples, at
+    least ``len(fir) - 1``), ``phase`` (offset of the next kept sample)
+    and ``noise_pos`` are updated in place, so consecutive calls filter
+    and decimate one continuous stream. ``work`` (at least
+    ``len(fir_hist) + len(pcm)`` samples) and ``out`` (at least
+    ``len(pcm) // ratio + 1``) are caller-owned scratch; the result is a
+    view of ``out``.
+    """
+    n = pcm.shape[0]
+    n_hist = fir_hist.shape[0]
+    y = work[:n_hist + n]
+    y[:n_hist] = fir_hist
+    for i in range(n):
+        v = pcm[i] * INT16_SCALE
+        for s in range(sos.shape[0]):
+            w = sos[s, 0] * v + zi[s, 0]
+            zi[s, 0] = sos[s, 1] * v - sos[s, 4] * w + zi[s, 1]
+            zi[s, 1] = sos[s, 2] * v - sos[s, 5] * w
+            v = w
+        y[n_hist + i] = v
+
+    start = phase[0]
+    n_out = max(0, (n - start + ratio - 1) // ratio)
+    r = noise_pos[0]
+    for k in range(n_out):
+        m = n_hist + start + k * ratio
+        acc = 0.0
+        for j in range(fir.shape[0]):
+            acc += fir[j] * y[m - j]
+        v = (acc + noise[r]) * gain
+        r += 1
+        if r == noise.shape[0]:
+            r = 0
+        v = min(max(v, -SOFT_CLIP_LIMIT), SOFT_CLIP_LIMIT)
+        v2 = v * v
+        out[k] = v * (27.0 + v2) / (27.0 + 9.0 * v2) / gain
+
+    phase[0] = start + n_out * ratio - n
+    noise_pos[0] = r
+    fir_hist[:] = y[n:]
+    return out[:n_out]
@@ -0,0 +1,202 @@
+"""Silero VAD on ONNX Runtime with hardware execution providers."""
+
+import hashlib
+import os
+import platform
+from importlib import resources
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+import torch
+
+# Tried in order; unavailable ones are skipped. CoreML maps to the ANE/GPU
+# on Apple silicon, CPU is always the final fallback.
+PREFERRED_PROVIDERS = (
+    'CoreMLExecutionProvider',
+    'CUDAExecutionProvider',
+    'DmlExecutionProvider',
+    'CPUExecutionProvider',
+)
+
+# IOBinding device for the recurrent state, per execution provider
+_STATE_DEVICE = {'CUDAExecutionProvider': 'cuda', 'DmlExecutionProvider': 'dml'}
+
+# Graph-optimized copies of CPU models, reused across runs
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', '~/.cache')).expanduser() / 'silero_vad_phone_test'
+
+
+def silero_onnx_path() -> str:
+    """Path of the ONNX model shipped with the silero-vad package."""
+    return str(resources.files('silero_vad.data').joinpath('silero_vad.onnx'))
+
+
+def optimized_model_path(path: str) -> Path:
+    """Cache location of the ORT-optimized copy of the model at ``path``.
+
+    Fully optimized graphs may contain hardware-specific kernels, so the
+    name is keyed by ONNX Runtime version and machine as well as the source.
+    """
+    src = Path(path).resolve()
+    key = hashlib.sha1(str(src).encode()).hexdigest()[:8]
+    return CACHE_DIR / f"{src.stem}-{key}.ort{ort.__version__}.{platform.machine()}.onnx"
+
+
+def model_input_dtype(path: str) -> type:
+    """Audio input dtype of the model at ``path`` (int16 for ``--int16-input``)."""
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    session = ort.InferenceSession(path, sess_options=opts,
+                                   providers=['CPUExecutionProvider'])
+    return _input_dtype(session)
+
+
+def _input_dtype(session: ort.InferenceSession) -> type:
+    audio_input = next(i for i in session.get_inputs() if i.name == 'input')
+    return np.int16 if audio_input.type == 'tensor(int16)' else np.float32
+
+
+def window_size(sample_rate: int) -> tuple[int, int]:
+    """(window, context) sample counts Silero uses at ``sample_rate``."""
+    return (512, 64) if sample_rate == 16000 else (256, 32)
+
+
+class SileroOnnxModel:
+    """Single-stream Silero VAD session on ONNX Runtime.
+
+    ``predict()`` takes one window of audio as a NumPy array (float32, or
+    int16 PCM for models with an int16 input) and
+    returns the speech probability; the window is copied into a
+    preallocated ``(1, context + window)`` input that carries the context
+    samples over in place, so no torch tensors or per-chunk arrays are
+    built. The ``(tensor, sr) -> tensor`` call and ``reset_states()`` of
+    silero's ``OnnxWrapper`` are kept for use with ``VADIterator``.
+
+    The first available execution provider from ``providers`` is used. On
+    device providers the recurrent state is passed between chunks through
+    IOBinding, so it stays on the device and only the audio and the
+    probability cross the host boundary. CPU-memory providers use a plain
+    ``run()``, which has less per-call overhead than a binding. On CPU the
+    fully optimized graph is cached under ``CACHE_DIR``, so later starts
+    skip the optimization passes.
+    """
+
+    def __init__(self, path: str | None = None,
+                 providers: tuple[str, ...] = PREFERRED_PROVIDERS):
+        path = path or silero_onnx_path()
+        available = ort.get_available_providers()
+        providers = [p for p in providers if p in available]
+
+        # Single-threaded, sequential and fully optimized: thread-pool
+        # wake-ups cost more than the math on a 256-sample window
+        opts = ort.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if providers[0] == 'CPUExecutionProvider':
+            path = self._use_optimized_cache(path, opts)
+
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=providers)
+        self.provider = self.session.get_providers()[0]
+        # Models from ``vad-quantize --int16-input`` take raw int16 PCM
+        self.input_dtype = _input_dtype(self.session)
+        self._device = _STATE_DEVICE.get(self.provider)
+        if self._device is None:
+            self._run = self._run_host
+        else:
+            self._binding = self.session.io_binding()
+            self._run = self._run_bound
+        self._set_rate(8000)
+
+    @staticmethod
+    def _use_optimized_cache(path: str, opts: ort.SessionOptions) -> str:
+        """Load the cached optimized model, or have ORT write it on this load."""
+        cached = optimized_model_path(path)
+        if cached.exists() and cached.stat().st_mtime >= os.path.getmtime(path):
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            return str(cached)
+        try:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return path
+        if not os.access(cached.parent, os.W_OK):
+            return path
+        opts.optimized_model_filepath = str(cached)
+        opts.log_severity_level = 3  # expected hardware-specific-model warning
+        return path
+
+    def _set_rate(self, sr: int):
+        if sr not in (8000, 16000):
+            raise ValueError("Supported sampling rates: [8000, 16000]")
+        self._num_samples, self._context_size = window_size(sr)
+        self._window = np.zeros((1, self._context_size + self._num_samples),
+                                dtype=self.input_dtype)
+        self._sr = sr
+        self._sr_input = np.array(sr, dtype=np.int64)
+        if self._device is not None:
+            self._bind_host_buffers()
+        self.reset_states()
+
+    def _bind_host_buffers(self):
+        # Bound once per rate: the OrtValues share memory with the window,
+        # sr and probability arrays, so only the state is rebound per call
+        self._prob = np.zeros((1, 1), dtype=np.float32)
+        self._host_values = [ort.OrtValue.ortvalue_from_numpy(a)
+                             for a in (self._window, self._sr_input, self._prob)]
+        window, sr, prob = self._host_values
+        self._binding.bind_ortvalue_input('input', window)
+        self._binding.bind_ortvalue_input('sr', sr)
+        self._binding.bind_ortvalue_output('output', prob)
+
+    def reset_states(self):
+        state = np.zeros((2, 1, 128), dtype=np.float32)
+        if self._device is not None:
+            # Two device buffers, swapped between input and output each call
+            self._state_next = ort.OrtValue.ortvalue_from_numpy(state, self._device)
+            state = ort.OrtValue.ortvalue_from_numpy(state, self._device)
+        self._state = state
+        self._window[:, :self._context_size] = 0.0
+
+    def predict(self, audio: np.ndarray, sr: int) -> float:
+        """Speech probability for the next window of audio (of ``input_dtype``)."""
+        if sr != self._sr:
+            self._set_rate(sr)
+        if len(audio) != self._num_samples:
+            raise ValueError(f"Provided number of samples is {len(audio)} "
+                             f"(Supported values: 256 for 8000 sample rate, 512 for 16000)")
+
+        window = self._window
+        context_size = self._context_size
+        window[0, context_size:] = audio
+        out = self._run(window)
+        window[0, :context_size] = window[0, -context_size:]
+        return float(out[0, 0])
+
+    def skip(self, audio: np.ndarray, sr: int):
+        """Take ``audio`` as context for the next window without running the model."""
+        if sr != self._sr:
+            self._set_rate(sr)
+        self._window[0, :self._context_size] = audio[-self._context_size:]
+
+    def __call__(self, x, sr: int) -> torch.Tensor:
+        if x.dim() == 2:
+            if x.shape[0] != 1:
+                raise ValueError("SileroOnnxModel runs a single stream (batch size 1)")
+            x = x[0]
+        return torch.tensor([[self.predict(x.numpy(), sr)]])
+
+    def _run_host(self, window: np.ndarray) -> np.ndarray:
+        out, self._state = self.session.run(
+            None, {'input': window, 'state': self._state, 'sr': self._sr_input}
+        )
+        return out
+
+    def _run_bound(self, window: np.ndarray) -> np.ndarray:
+        # window is already bound (it is self._window)
+        binding = self._binding
+        binding.bind_ortvalue_input('state', self._state)
+        binding.bind_ortvalue_output('stateN', self._state_next)
+        self.session.run_with_iobinding(binding)
+        self._state, self._state_next = self._state_next, self._state
+        return self._prob
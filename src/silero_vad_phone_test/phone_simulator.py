@@ -2,23 +2,177 @@
 
 import numpy as np
 
+try:
+    from scipy.signal import butter, firwin, sosfilt, sosfilt_zi, upfirdn
+except ImportError:
+    sosfilt = None
+
+from . import kernels
+from .kernels import INT16_SCALE, SOFT_CLIP_LIMIT
+
+NOISE_STD = 0.002        # Line noise level
+NOISE_SECONDS = 10       # Length of the precomputed line-noise loop
+COMPRESSION_GAIN = 1.5   # Soft-clip drive for codec-style compression
+DECIMATION_TAPS = 32     # Anti-alias FIR order for downsampling
+
+# Fused kernels: prefer the AOT-built extension (see build_kernels) if it
+# was built from this kernels.py, then numba JIT, then the NumPy/SciPy path
+# in degrade()
+try:
+    from . import phone_kernels as _aot
+except ImportError:
+    _aot = None
+if _aot is not None and getattr(_aot, 'abi_version', lambda: None)() != kernels.KERNEL_ABI:
+    print("Note: phone_kernels is out of date, using numba JIT "
+          "(rebuild with vad-build-kernels)")
+    _aot = None
+
+if _aot is not None:
+    _postprocess = _aot.postprocess
+    _degrade_pcm = _aot.degrade_pcm
+else:
+    try:
+        from numba import njit
+    except ImportError:
+        _postprocess = _degrade_pcm = None
+    else:
+        _postprocess = njit(cache=True, fastmath=True)(kernels.postprocess)
+        _degrade_pcm = njit(cache=True, fastmath=True)(kernels.degrade_pcm)
+
+
+def _passthrough(audio: np.ndarray) -> np.ndarray:
+    return audio
+
 
 class PhoneAudioSimulator:
     """Simulates phone-quality audio degradation (8kHz narrowband)."""
 
     def __init__(self, input_rate: int = 16000, output_rate: int = 8000):
-        self.input_rate = input_rate
         self.output_rate = output_rate
 
-        # Phone bandpass filter (300-3400 Hz)
-        try:
-            from scipy.signal import butter
-            self.sos = butter(4, [300, 3400], btype='band',
-                             fs=input_rate, output='sos')
-            self.use_filter = True
-        except ImportError:
+        # Line noise, drawn once (PCG64) and read as a loop; noise_pos is
+        # an array so the kernels can advance it in place
+        rng = np.random.default_rng()
+        self._noise = rng.standard_normal(output_rate * NOISE_SECONDS, dtype=np.float32)
+        self._noise *= NOISE_STD
+        self._noise_pos = np.zeros(1, dtype=np.int64)
+
+        self.use_filter = sosfilt is not None
+        if not self.use_filter:
             print("Note: scipy not installed, skipping bandpass filter")
-            self.use_filter = False
+        self.input_rate = None
+        self.update_rate(input_rate)
+
+    def update_rate(self, input_rate: int):
+        """Redesign the filters and reset their state for a new input rate.
+
+        Does nothing if the rate is unchanged; the noise loop is kept either way.
+        """
+        if input_rate == self.input_rate:
+            return
+        self.input_rate = input_rate
+        self.ratio = max(1, input_rate // self.output_rate)
+
+        # Phone band filter (300-3400 Hz). When downsampling, the anti-alias
+        # FIR of the decimator supplies the upper edge, so only a 300 Hz
+        # highpass runs at the input rate. Coefficients are float32 to match
+        # the incoming audio, and the filter state carries across chunks.
+        # The filter stage is bound once here so degrade() never branches on it.
+        if not self.use_filter:
+            sos = np.empty((0, 6))
+            fir = np.ones(1)          # plain stride decimation
+            self._apply_filter = _passthrough
+            self._stride = self.ratio
+        elif self.ratio > 1:
+            sos = butter(4, 300, btype='highpass', fs=input_rate, output='sos')
+            # Same taps scipy.signal.decimate(n=32, ftype='fir') designs,
+            # built once instead of per chunk
+            fir = firwin(DECIMATION_TAPS + 1, 1.0 / self.ratio, window='hamming')
+            self._apply_filter = self._filter_and_decimate
+            self._stride = 1
+        else:
+            sos = butter(4, [300, 3400], btype='band', fs=input_rate, output='sos')
+            fir = np.ones(1)
+            self._apply_filter = self._bandpass
+            self._stride = 1
+        self.sos = sos.astype(np.float32)
+        self.decimation_fir = fir.astype(np.float32)
+        self._zi = np.zeros((self.sos.shape[0], 2), dtype=np.float32)
+        # Filter state for a constant unit input; scaled by the first sample
+        # so a DC offset at stream start does not ring through the filter
+        self._zi_step = (sosfilt_zi(sos).astype(np.float32) if len(sos)
+                         else self._zi.copy())
+        self._primed = False
+
+        # Decimator state shared by both filter paths: FIR history (rounded
+        # up to whole output periods, which upfirdn needs) and output phase,
+        # plus kernel scratch and output buffers (grown to the largest input)
+        n_hist = -(-(len(fir) - 1) // self.ratio) * self.ratio
+        self._fir_hist = np.zeros(n_hist, dtype=np.float32)
+        self._phase = np.zeros(1, dtype=np.int64)
+        self._work = np.empty(0, dtype=np.float32)
+        self._out = np.empty(0, dtype=np.float32)
+
+    def warm_up(self):
+        """Compile (or load) the fused kernel now, leaving the stream state untouched."""
+        if _degrade_pcm is not None:
+            _degrade_pcm(np.zeros(self.ratio, dtype=np.int16), self.sos, self._zi.copy(),
+                         self.decimation_fir, self._fir_hist.copy(), self._phase.copy(),
+                         self.ratio, COMPRESSION_GAIN, self._noise, self._noise_pos.copy(),
+                         np.empty(len(self._fir_hist) + self.ratio, dtype=np.float32),
+                         np.empty(2, dtype=np.float32))
+
+    def _prime(self, first_sample: float):
+        np.multiply(self._zi_step, first_sample, out=self._zi)
+        self._primed = True
+
+    def _bandpass(self, audio: np.ndarray) -> np.ndarray:
+        # In place, like _filter_and_decimate
+        audio, self._zi[:] = sosfilt(self.sos, audio, zi=self._zi)
+        return audio
+
+    def _filter_and_decimate(self, audio: np.ndarray) -> np.ndarray:
+        # upfirdn only evaluates the kept output samples. The FIR history is
+        # prepended and the phase carried over, so chunk edges decimate
+        # like one continuous stream (as in the fused kernel).
+        # zi is copied back so it stays the float32 array the kernels take,
+        # even when float64 input makes sosfilt return float64 state
+        audio, self._zi[:] = sosfilt(self.sos, audio, zi=self._zi)
+        n = len(audio)
+        start = self._phase[0]
+        n_out = max(0, -(-(n - start) // self.ratio))
+        x = np.concatenate([self._fir_hist, audio])
+        first = len(self._fir_hist) // self.ratio
+        out = upfirdn(self.decimation_fir, x[start:], up=1, down=self.ratio)
+        self._phase[0] = start + n_out * self.ratio - n
+        self._fir_hist[:] = x[n:]
+        return out[first:first + n_out]
+
+    def degrade_pcm(self, pcm: np.ndarray) -> np.ndarray:
+        """
+        degrade() for int16 PCM, including the conversion to float32.
+
+        With numba this is one fused kernel and a single pass over the
+        input; the decimator also keeps its FIR history and phase across
+        calls, so chunk edges are filtered as one continuous stream. The
+        kernel writes into buffers owned by the simulator, so the result is
+        only valid until the next call.
+        """
+        if pcm.dtype != np.int16:
+            raise TypeError(f"degrade_pcm() expects int16 PCM, got {pcm.dtype}")
+        if _degrade_pcm is None:
+            return self.degrade(pcm * INT16_SCALE)
+        # The AOT exports take exactly i2[:] and do not check their input
+        pcm = np.ascontiguousarray(pcm)
+        if not self._primed and len(pcm):
+            self._prime(pcm[0] * INT16_SCALE)
+        n = len(pcm)
+        if len(self._work) < len(self._fir_hist) + n:
+            self._work = np.empty(len(self._fir_hist) + n, dtype=np.float32)
+            self._out = np.empty(n // self.ratio + 1, dtype=np.float32)
+        return _degrade_pcm(pcm, self.sos, self._zi, self.decimation_fir,
+                            self._fir_hist, self._phase, self.ratio, COMPRESSION_GAIN,
+                            self._noise, self._noise_pos, self._work, self._out)
 
     def degrade(self, audio: np.ndarray) -> np.ndarray:
         """
@@ -26,25 +180,48 @@ class PhoneAudioSimulator:
 
         Applies:
         1. Bandpass filter (300-3400 Hz phone frequency range)
-        2. Downsampling to 8kHz
+        2. Downsampling to 8kHz (polyphase FIR decimation)
         3. Subtle line noise
         4. Light compression (codec simulation)
+
+        Steps 2-4 run as one fused Numba kernel when numba is installed.
         """
-        # 1. Bandpass filter (phone frequency range)
-        if self.use_filter:
-            from scipy.signal import sosfilt
-            audio = sosfilt(self.sos, audio).astype(np.float32)
+        # 1-2. Bandpass filter (phone frequency range) and decimation
+        if not self._primed and len(audio):
+            self._prime(audio[0])
+        audio = self._apply_filter(audio)
+        # float32 and contiguous whatever the caller passed: the AOT
+        # postprocess export takes exactly f4[:] and does not check
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+
+        if _postprocess is not None:
+            return _postprocess(audio, self._stride, COMPRESSION_GAIN,
+                                self._noise, self._noise_pos)
 
-        # 2. Downsample to 8kHz
-        if self.input_rate != self.output_rate:
-            ratio = self.input_rate // self.output_rate
-            audio = audio[::ratio]
+        # 2. Downsample to 8kHz (plain stride when scipy is unavailable)
+        if self._stride > 1:
+            audio = audio[::self._stride]
 
         # 3. Add subtle noise (simulates line noise)
-        noise = np.random.normal(0, 0.002, len(audio)).astype(np.float32)
+        n = len(audio)
+        pos = self._noise_pos[0]
+        if pos + n <= len(self._noise):
+            noise = self._noise[pos:pos + n]
+        else:
+            noise = np.take(self._noise, np.arange(pos, pos + n), mode='wrap')
+        self._noise_pos[0] = (pos + n) % len(self._noise)
         audio = audio + noise
 
-        # 4. Light compression (phone codecs compress dynamic range)
-        audio = np.tanh(audio * 1.5) / 1.5
+        # 4. Light compression (phone codecs compress dynamic range):
+        # tanh(g*x)/g via the rational approximation x(27+x^2)/(27+9x^2)
+        x = audio
+        x *= COMPRESSION_GAIN
+        np.clip(x, -SOFT_CLIP_LIMIT, SOFT_CLIP_LIMIT, out=x)
+        x2 = x * x
+        x *= x2 + 27.0
+        x2 *= 9.0
+        x2 += 27.0
+        x /= x2
+        x /= COMPRESSION_GAIN
 
         return audio
@@ -0,0 +1,328 @@
+"""Build INT8 variants of the Silero VAD ONNX model for CPU inference.
+
+The stock model dispatches on ``sr`` through an ONNX ``If`` whose branches
+hold the weights as ``Constant`` nodes, which the ONNX Runtime quantizer
+cannot see. The model is first specialized to one sample rate (the ``If``
+branch becomes the graph and its constants become initializers), then
+either statically quantized with calibration data run through the phone
+simulator, or dynamically (weight-only) quantized:
+
+    vad-quantize --output silero_vad_8k.int8.onnx [--calibration-wav speech.wav]
+    vad-quantize --mode dynamic --output silero_vad_8k.dyn.onnx
+
+INT8 is not a guaranteed win on every CPU/ORT build, so the tool reports
+latency and the largest probability change against the FP32 model on the
+same audio; keep the quantized model only if it wins on the target device.
+
+Load the result with ``vad-test --model silero_vad_8k.int8.onnx``.
+``--int16-input`` also gives the models an int16 PCM input that is cast
+and scaled inside the graph (use with ``vad-test --no-degrade``).
+"""
+
+import argparse
+import os
+import time
+import wave
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto, helper
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+
+from .onnx_model import SileroOnnxModel, silero_onnx_path, window_size
+from .phone_simulator import PhoneAudioSimulator
+
+STATE_SHAPE = (2, 1, 128)    # Silero recurrent state (layers, batch, hidden)
+# Integer-arithmetic ops the quantizers emit (plus every QLinear* op)
+QUANTIZED_OP_TYPES = {'DynamicQuantizeLSTM', 'DynamicQuantizeMatMul',
+                      'MatMulInteger', 'ConvInteger'}
+# Weight-only candidates. Conv is left out: dynamically quantizing its
+# activations costs accuracy (see quantize_dynamic_model).
+DYNAMIC_OP_TYPES = ('MatMul', 'Gemm', 'LSTM')
+
+
+def specialize_for_rate(model: onnx.ModelProto, sample_rate: int) -> onnx.ModelProto:
+    """Inline the ``sr`` branch of the Silero graph for a fixed sample rate.
+
+    The ``sr`` input is kept (unused) so callers can feed the same inputs
+    as for the stock model.
+    """
+    if_node = next(n for n in model.graph.node if n.op_type == 'If')
+    branches = {a.name: a.g for a in if_node.attribute}
+    # Top-level graph: Equal(sr, 16000) -> If(then=16 kHz, else=8 kHz)
+    branch = branches['then_branch' if sample_rate == 16000 else 'else_branch']
+
+    initializers = list(branch.initializer)
+    nodes = []
+    for node in branch.node:
+        if node.op_type == 'Constant' and [a.name for a in node.attribute] == ['value']:
+            tensor = onnx.TensorProto()
+            tensor.CopyFrom(node.attribute[0].t)
+            tensor.name = node.output[0]
+            initializers.append(tensor)
+        else:
+            nodes.append(node)
+
+    for branch_out, graph_out in zip(branch.output, model.graph.output):
+        nodes.append(helper.make_node('Identity', [branch_out.name], [graph_out.name]))
+
+    graph = helper.make_graph(
+        nodes, f'silero_vad_{sample_rate // 1000}k',
+        list(model.graph.input), list(model.graph.output),
+        initializer=initializers, value_info=list(branch.value_info),
+    )
+    return helper.make_model(graph, opset_imports=model.opset_import,
+                             ir_version=model.ir_version)
+
+
+def _rename_input(graph: onnx.GraphProto, old: str, new: str):
+    """Point every consumer of ``old`` at ``new``, including in subgraphs."""
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == old:
+                node.input[i] = new
+        for attr in node.attribute:
+            if attr.type == onnx.AttributeProto.GRAPH:
+                _rename_input(attr.g, old, new)
+            for g in attr.graphs:
+                _rename_input(g, old, new)
+
+
+def add_int16_input(model: onnx.ModelProto) -> onnx.ModelProto:
+    """Make the ``input`` tensor int16 PCM, cast and scaled to [-1, 1] in-graph."""
+    graph = model.graph
+    _rename_input(graph, 'input', 'input_f32')
+    next(i for i in graph.input if i.name == 'input').type.tensor_type.elem_type = TensorProto.INT16
+
+    graph.initializer.append(helper.make_tensor('input_scale', TensorProto.FLOAT, [], [1.0 / 32768.0]))
+    prelude = [
+        helper.make_node('Cast', ['input'], ['input_cast'], to=TensorProto.FLOAT),
+        helper.make_node('Mul', ['input_cast', 'input_scale'], ['input_f32']),
+    ]
+    for node in reversed(prelude):
+        graph.node.insert(0, node)
+    return model
+
+
+def count_quantized_nodes(graph: onnx.GraphProto) -> int:
+    """Number of integer-arithmetic nodes in ``graph``, including subgraphs."""
+    count = 0
+    for node in graph.node:
+        if node.op_type in QUANTIZED_OP_TYPES or node.op_type.startswith('QLinear'):
+            count += 1
+        for attr in node.attribute:
+            if attr.type == onnx.AttributeProto.GRAPH:
+                count += count_quantized_nodes(attr.g)
+            for g in attr.graphs:
+                count += count_quantized_nodes(g)
+    return count
+
+
+def read_wav(path: str) -> tuple[np.ndarray, int]:
+    """Read a 16-bit PCM WAV as mono float32 in [-1, 1]."""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM audio")
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        pcm = pcm.reshape(-1, wf.getnchannels()).mean(axis=1)
+    return (pcm / 32768.0).astype(np.float32), rate
+
+
+def synthetic_speech(rate: int = 16000, seconds: float = 8.0,
+                     seed: int = 0) -> np.ndarray:
+    """Voiced-like harmonic bursts separated by background noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    audio = rng.normal(0, 0.003, t.size)
+    start = 0.5
+    while start < seconds - 0.5:
+        length = rng.uniform(0.3, 1.2)
+        mask = (t >= start) & (t < start + length)
+        f0 = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 4 * t[mask]))
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        audio[mask] += 0.3 * sum(np.sin(k * phase) / k for k in range(1, 16))
+        start += length + rng.uniform(0.3, 1.0)
+    return audio.astype(np.float32)
+
+
+class PhoneCalibrationReader(CalibrationDataReader):
+    """Feeds model inputs for consecutive chunks of phone-degraded audio.
+
+    The FP32 model is run over the audio so every calibration sample
+    carries the recurrent state and context it would see when streaming.
+    """
+
+    def __init__(self, model_path: str, audio: np.ndarray, sample_rate: int):
+        session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        window, context_size = window_size(sample_rate)
+        sr = np.array(sample_rate, dtype=np.int64)
+        state = np.zeros(STATE_SHAPE, dtype=np.float32)
+        context = np.zeros((1, context_size), dtype=np.float32)
+
+        self._feeds = []
+        for i in range(0, len(audio) - window + 1, window):
+            x = np.concatenate([context, audio[None, i:i + window]], axis=1)
+            feed = {'input': x, 'state': state, 'sr': sr}
+            self._feeds.append(feed)
+            _, state = session.run(None, feed)
+            context = x[:, -context_size:]
+        self._iter = iter(self._feeds)
+
+    def get_next(self) -> dict | None:
+        return next(self._iter, None)
+
+
+def specialized_path(dst: str) -> str:
+    """Path of the FP32 rate-specialized model saved next to ``dst``."""
+    specialized = os.path.splitext(dst)[0] + '.fp32.onnx'
+    if os.path.abspath(specialized) == os.path.abspath(dst):
+        raise ValueError(f"{dst}: output would overwrite the FP32 model")
+    return specialized
+
+
+def _save_specialized(src: str, dst: str, sample_rate: int) -> str:
+    specialized = specialized_path(dst)
+    onnx.save(specialize_for_rate(onnx.load(src), sample_rate), specialized)
+    return specialized
+
+
+def quantize_static_model(src: str, dst: str, audio: np.ndarray,
+                          sample_rate: int = 8000, per_channel: bool = False) -> None:
+    """Specialize ``src`` to ``sample_rate`` and quantize it to INT8 (QOperator)."""
+    specialized = _save_specialized(src, dst, sample_rate)
+
+    # QOperator: ORT's CPU kernels often gain nothing from the QDQ format
+    quantize_static(
+        specialized, dst,
+        PhoneCalibrationReader(specialized, audio, sample_rate),
+        quant_format=QuantFormat.QOperator,
+        activation_type=QuantType.QInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+    )
+
+
+def quantize_dynamic_model(src: str, dst: str, sample_rate: int = 8000,
+                           op_types: tuple[str, ...] = DYNAMIC_OP_TYPES,
+                           per_channel: bool = False) -> None:
+    """Specialize ``src`` to ``sample_rate`` and quantize its weights to INT8.
+
+    Current Silero models (v5+) have no MatMul/Gemm, and ORT's quantizer
+    does not reach the LSTMs nested in ``If`` subgraphs, so the default op
+    types leave those models unchanged; adding ``Conv`` quantizes the
+    encoder but was measured to shift probabilities by up to 0.9. Raises
+    ValueError (and removes ``dst``) if no node was quantized.
+    """
+    specialized = _save_specialized(src, dst, sample_rate)
+    quantize_dynamic(specialized, dst, weight_type=QuantType.QInt8,
+                     op_types_to_quantize=list(op_types), per_channel=per_channel)
+    if count_quantized_nodes(onnx.load(dst).graph) == 0:
+        os.remove(dst)
+        raise ValueError(
+            f"dynamic quantization of {', '.join(op_types)} changed nothing in this "
+            f"model (no such ops outside If subgraphs); use --mode static"
+        )
+
+
+def compare_models(reference: str, candidate: str, audio: np.ndarray,
+                   sample_rate: int, repeats: int = 5) -> dict:
+    """CPU latency per chunk (us) of both models and their max probability gap."""
+    window, _ = window_size(sample_rate)
+    chunks = [audio[i:i + window] for i in range(0, len(audio) - window + 1, window)]
+    stats = {}
+    probs = []
+    for name, path in (('reference', reference), ('candidate', candidate)):
+        model = SileroOnnxModel(path, ('CPUExecutionProvider',))
+        probs.append(np.array([model.predict(c, sample_rate) for c in chunks]))
+        model.reset_states()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for c in chunks:
+                model.predict(c, sample_rate)
+        stats[f'{name}_us'] = (time.perf_counter() - start) / (repeats * len(chunks)) * 1e6
+    stats['max_prob_diff'] = float(np.abs(probs[0] - probs[1]).max())
+    return stats
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Quantize the Silero VAD ONNX model to INT8"
+    )
+    parser.add_argument(
+        '--output', default='silero_vad_8k.int8.onnx',
+        help='Quantized model path (default: silero_vad_8k.int8.onnx)'
+    )
+    parser.add_argument(
+        '--mode', default='static', choices=['static', 'dynamic'],
+        help='static: calibrated activations and weights; dynamic: weights only '
+             '(default: static)'
+    )
+    parser.add_argument(
+        '--calibration-wav', default=None,
+        help='16-bit PCM WAV of representative speech (default: synthetic)'
+    )
+    parser.add_argument(
+        '--sample-rate', type=int, default=8000, choices=[8000, 16000],
+        help='Sample rate the model is specialized for (default: 8000)'
+    )
+    parser.add_argument(
+        '--per-channel', action='store_true',
+        help='One weight scale per output channel instead of per tensor '
+             '(static mode only)'
+    )
+    parser.add_argument(
+        '--int16-input', action='store_true',
+        help='Take int16 PCM input and convert it inside the graph'
+    )
+    args = parser.parse_args()
+    if args.per_channel and args.mode == 'dynamic':
+        parser.error("--per-channel only applies to --mode static")
+    try:
+        specialized = specialized_path(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.calibration_wav:
+        audio, rate = read_wav(args.calibration_wav)
+    else:
+        rate = 16000
+        audio = synthetic_speech(rate)
+
+    # Calibrate and compare on what the VAD actually sees: phone-degraded audio
+    audio = PhoneAudioSimulator(rate, args.sample_rate).degrade(audio)
+
+    if args.mode == 'static':
+        quantize_static_model(silero_onnx_path(), args.output, audio, args.sample_rate,
+                              per_channel=args.per_channel)
+    else:
+        try:
+            quantize_dynamic_model(silero_onnx_path(), args.output, args.sample_rate)
+        except ValueError as e:
+            parser.error(str(e))
+
+    quantized = count_quantized_nodes(onnx.load(args.output).graph)
+    stats = compare_models(specialized, args.output, audio, args.sample_rate)
+    print(f"FP32: {os.path.getsize(specialized) / 1024:.0f} KB, "
+          f"{stats['reference_us']:.0f} us/chunk")
+    print(f"INT8 {args.mode} ({quantized} quantized nodes): "
+          f"{os.path.getsize(args.output) / 1024:.0f} KB, "
+          f"{stats['candidate_us']:.0f} us/chunk, "
+          f"max probability change {stats['max_prob_diff']:.3f}")
+
+    if args.int16_input:
+        for path in (args.output, specialized):
+            onnx.save(add_int16_input(onnx.load(path)), path)
+    print(f"Saved quantized model to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Best-effort scheduling hints for latency-critical threads."""
+
+import ctypes
+import os
+import sys
+import threading
+
+QOS_CLASS_USER_INTERACTIVE = 0x21   # <sys/qos.h>
+NICE_LEVEL = -10
+HYBRID_PCORES = '/sys/devices/cpu_core/cpus'   # Intel hybrid CPUs: P-core list
+
+
+def _parse_cpu_list(text: str) -> set[int]:
+    """Parse a kernel CPU list such as ``"0-7,16"``."""
+    cpus: set[int] = set()
+    for part in text.strip().split(','):
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def raise_thread_priority():
+    """Ask the OS to treat the calling thread as latency-critical.
+
+    macOS: QoS class USER_INTERACTIVE, which keeps the thread on P-cores on
+    Apple silicon. Linux: pin to P-cores on hybrid CPUs and raise the
+    thread's priority to nice -10 (needs CAP_SYS_NICE). Anything the OS
+    refuses is skipped silently.
+    """
+    if sys.platform == 'darwin':
+        try:
+            libc = ctypes.CDLL('/usr/lib/libSystem.dylib')
+            libc.pthread_set_qos_class_self_np(QOS_CLASS_USER_INTERACTIVE, 0)
+        except (OSError, AttributeError):
+            pass
+    elif sys.platform.startswith('linux'):
+        tid = threading.get_native_id()
+        try:
+            with open(HYBRID_PCORES) as f:
+                os.sched_setaffinity(tid, _parse_cpu_list(f.read()))
+        except (OSError, ValueError):
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, NICE_LEVEL)
+        except OSError:
+            pass
@@ -1,7 +1,6 @@
 """Real-time streaming VAD with phone audio simulation."""
 
 import collections
-import queue
 import sys
 import threading
 import time
@@ -10,9 +9,23 @@ from dataclasses import dataclass
 import numpy as np
 import pyaudio
 import torch
-from silero_vad import load_silero_vad, VADIterator
+from silero_vad import VADIterator
 
+from .onnx_model import PREFERRED_PROVIDERS, SileroOnnxModel
+from .kernels import INT16_SCALE
 from .phone_simulator import PhoneAudioSimulator
+from .realtime import raise_thread_priority
+
+RING_SLOTS = 32   # Preallocated input chunks (~1 s at 32 ms)
+MAX_LAG_CHUNKS = 8   # Backlog beyond this skips the oldest chunks (~256 ms)
+MAX_SPEECH_CHUNKS = 1875   # Speech audio kept per utterance (60 s at 32 ms)
+GATE_MODEL_EVERY = 4   # Gated silence still runs the model every Nth chunk
+METER_WIDTH = 30
+DISPLAY_INTERVAL = 0.05   # Meter refresh period of the display thread (20 Hz)
+WARMUP_RUNS = 3   # Model calls on silence before streaming starts
+
+# Every possible meter bar, indexed by filled length
+_METER_BARS = tuple("█" * i + "░" * (METER_WIDTH - i) for i in range(METER_WIDTH + 1))
 
 
 @dataclass
@@ -22,6 +35,7 @@ class AudioConfig:
     output_rate: int = 8000      # Phone quality
     channels: int = 1
     chunk_ms: int = 32           # VAD window size
+    max_batch: int = 2           # Queued chunks drained per pass (adds <= this many chunk_ms)
     format: int = pyaudio.paInt16
 
     @property
@@ -33,14 +47,183 @@ class AudioConfig:
         return int(self.output_rate * self.chunk_ms / 1000)  # 256 at 8kHz
 
 
+class StreamingVADIterator(VADIterator):
+    """VADIterator that keeps the speech probability of the last chunk.
+
+    Silero's iterator discards the probability it computes, so reading it
+    for the meter used to take a second model call per chunk, which also
+    advanced the model's recurrent state twice. NumPy chunks are passed to
+    ``SileroOnnxModel.predict()`` directly.
+
+    With ``gate_db`` set, NumPy chunks whose mean power is below that level
+    (dBFS) while no speech is active count as probability 0 without running
+    the model; every ``GATE_MODEL_EVERY``-th such chunk still runs it so the
+    recurrent state keeps tracking the background.
+    """
+
+    def __init__(self, model, *args, gate_db: float | None = None, **kwargs):
+        # Mean-square power threshold, relative to full scale (1.0)
+        self.gate_power = None if gate_db is None else 10.0 ** (gate_db / 10.0)
+        super().__init__(model, *args, **kwargs)
+
+    def reset_states(self):
+        super().reset_states()
+        self._last_prob = 0.0
+        self._gated_run = 0
+
+    @property
+    def probability(self) -> float:
+        """Speech probability of the most recent chunk."""
+        return self._last_prob
+
+    def __call__(self, x, return_seconds: bool = False, time_resolution: int = 1):
+        if isinstance(x, np.ndarray):
+            if self._gated(x):
+                self.model.skip(x, self.sampling_rate)
+                return self._advance(0.0, len(x), return_seconds, time_resolution)
+            # NumPy straight into the ONNX session, no torch round trip
+            prob = self.model.predict(x, self.sampling_rate)
+            return self._advance(prob, len(x), return_seconds, time_resolution)
+        window_size_samples, prob = self._tensor_prob(x)
+        return self._advance(prob, window_size_samples, return_seconds, time_resolution)
+
+    def _gated(self, x: np.ndarray) -> bool:
+        """True if this chunk is quiet enough to skip the model."""
+        if self.gate_power is None or self.triggered:
+            self._gated_run = 0
+            return False
+        if x.dtype == np.int16:
+            x = x * INT16_SCALE  # int16 dot products overflow
+        if np.dot(x, x) >= self.gate_power * len(x):
+            self._gated_run = 0
+            return False
+        self._gated_run += 1
+        return self._gated_run % GATE_MODEL_EVERY != 0
+
+    @torch.inference_mode()
+    def _tensor_prob(self, x) -> tuple[int, float]:
+        # Shares memory with float32 buffers instead of copying like torch.Tensor()
+        x = torch.as_tensor(x, dtype=torch.float32)
+        window_size_samples = len(x[0]) if x.dim() == 2 else len(x)
+        return window_size_samples, self.model(x, self.sampling_rate).item()
+
+    def _advance(self, speech_prob: float, window_size_samples: int,
+                 return_seconds: bool, time_resolution: int) -> dict | None:
+        """Run Silero's start/end state machine for one chunk's probability."""
+        self._last_prob = speech_prob
+        self.current_sample += window_size_samples
+
+        if (speech_prob >= self.threshold) and self.temp_end:
+            self.temp_end = 0
+
+        if (speech_prob >= self.threshold) and not self.triggered:
+            self.triggered = True
+            speech_start = max(0, self.current_sample - self.speech_pad_samples - window_size_samples)
+            return {'start': self._timestamp(speech_start, return_seconds, time_resolution)}
+
+        if (speech_prob < self.threshold - 0.15) and self.triggered:
+            if not self.temp_end:
+                self.temp_end = self.current_sample
+            if self.current_sample - self.temp_end < self.min_silence_samples:
+                return None
+            speech_end = self.temp_end + self.speech_pad_samples - window_size_samples
+            self.temp_end = 0
+            self.triggered = False
+            return {'end': self._timestamp(speech_end, return_seconds, time_resolution)}
+
+        return None
+
+    def _timestamp(self, sample: float, return_seconds: bool, time_resolution: int):
+        if return_seconds:
+            return round(sample / self.sampling_rate, time_resolution)
+        return int(sample)
+
+
+class AudioRing:
+    """Single-producer/single-consumer ring of int16 input chunks.
+
+    The PyAudio callback only advances ``_head`` and the processing thread
+    only advances ``_tail``, so neither side takes a lock; the Event is only
+    used to wake a consumer waiting on an empty ring, by a push or close().
+
+    With ``max_lag`` set, a consumer that falls more than ``max_lag``
+    chunks behind skips the oldest ones (counted in ``skipped``), so
+    latency stays bounded; the producer still drops new chunks (counted in
+    ``dropped``) if the ring fills up entirely.
+    """
+
+    def __init__(self, slots: int, chunk_size: int, max_batch: int,
+                 max_lag: int | None = None):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be at least 1, got {max_batch}")
+        self.chunks = np.empty((slots, chunk_size), dtype=np.int16)
+        self._batch_buf = np.empty((max_batch, chunk_size), dtype=np.int16)
+        self._head = 0
+        self._tail = 0
+        self._ready = threading.Event()
+        self._closed = False
+        self.max_lag = slots if max_lag is None else max_lag
+        self.dropped = 0
+        self.skipped = 0
+
+    def push(self, data: bytes) -> bool:
+        """Copy an int16 PCM chunk into the next slot (producer side)."""
+        slots = len(self.chunks)
+        if self._head - self._tail == slots:
+            self.dropped += 1  # consumer fell a full ring behind
+            return False
+        self.chunks[self._head % slots] = np.frombuffer(data, dtype=np.int16)
+        self._head += 1
+        self._ready.set()
+        return True
+
+    def peek(self, max_chunks: int, timeout: float | None = None) -> np.ndarray | None:
+        """Oldest pending chunks, up to ``max_chunks``, as an (n, chunk_size) array.
+
+        Blocks while the ring is empty, for at most ``timeout`` seconds if
+        given; returns None on timeout or once the ring is closed. The
+        chunks stay owned by the ring until release().
+        """
+        while self._head == self._tail:
+            if self._closed or not self._ready.wait(timeout):
+                return None
+            self._ready.clear()
+        slots = len(self.chunks)
+        lag = self._head - self._tail
+        if lag > self.max_lag:
+            # Only the consumer moves _tail, so dropping the oldest is safe here
+            self.skipped += lag - self.max_lag
+            self._tail += lag - self.max_lag
+            lag = self.max_lag
+        n = min(lag, max_chunks)
+        start = self._tail % slots
+        if start + n <= slots:
+            return self.chunks[start:start + n]
+        # Wrapped around the end of the ring
+        batch = self._batch_buf[:n]
+        np.take(self.chunks, range(start, start + n), axis=0, out=batch, mode='wrap')
+        return batch
+
+    def release(self, n: int):
+        """Hand the ``n`` oldest chunks back to the producer."""
+        self._tail += n
+
+    def close(self):
+        """Wake the consumer and make peek() return None from now on."""
+        self._closed = True
+        self._ready.set()
+
+
 class StreamingVADTester:
     """Real-time VAD testing with microphone input."""
 
     def __init__(self, config: AudioConfig, vad_params: dict,
-                 degrade_audio: bool = True):
+                 degrade_audio: bool = True, model_path: str | None = None,
+                 providers: tuple[str, ...] = PREFERRED_PROVIDERS):
         self.config = config
-        self.audio_queue: queue.Queue = queue.Queue()
         self.running = False
+        self._out_size = config.output_chunk_size  # VAD window, fixed per run
+        self._alloc_buffers()
 
         # Phone audio simulator
         self.degrade_audio = degrade_audio
@@ -49,113 +232,207 @@ class StreamingVADTester:
                 config.input_rate, config.output_rate
             )
 
-        # Load Silero VAD
-        print("Loading Silero VAD model...")
-        self.model = load_silero_vad(onnx=True)
-        self.vad = VADIterator(
+        # Silero VAD (bundled model, or e.g. an INT8 build from vad-quantize)
+        print(f"Loading VAD model from {model_path}..." if model_path
+              else "Loading Silero VAD model...")
+        self.model = SileroOnnxModel(model_path, providers)
+        # int16-input models get the raw PCM (conversion happens in-graph)
+        self._pcm_model = self.model.input_dtype == np.int16
+        if self._pcm_model and degrade_audio:
+            raise ValueError("This model takes int16 PCM; run it with --no-degrade")
+        self._chunk_scratch = np.zeros(self._out_size, dtype=self.model.input_dtype)
+        # For the torch tensor path (_tensor_prob); load_silero_vad used to set this
+        torch.set_num_threads(1)
+        print(f"Execution provider: {self.model.provider}")
+        self.vad = StreamingVADIterator(
             self.model,
             sampling_rate=config.output_rate,
             **vad_params
         )
         print(f"VAD initialized with: {vad_params}")
+        self._warm_up()
 
         # State tracking
         self.is_speaking = False
         self.speech_start_time: float | None = None
-        self.speech_buffer: list = []
         self.total_speech_chunks = 0
+        # Audio of the current/last utterance, one row per chunk
+        self._speech_chunks = np.empty((MAX_SPEECH_CHUNKS, self._out_size), dtype=np.float32)
+        self._speech_write = 0
+
+        # Display thread input: latest (probability, speaking) and pending
+        # messages. Tuple assignment and deque append/popleft are atomic, so
+        # the processing thread never waits on the terminal.
+        self._display_state = (0.0, False)
+        self._messages: collections.deque[str] = collections.deque()
+        self._meter_line = ''
 
         # PyAudio setup
         self.pa = pyaudio.PyAudio()
 
+    def _warm_up(self):
+        """Pay one-time costs (numba kernel load, ORT first runs) before audio arrives.
+
+        The first degrade_pcm() call takes hundreds of ms even with numba's
+        cache, which would otherwise back up the ring on the first chunk.
+        """
+        if self.degrade_audio:
+            self.phone_sim.warm_up()
+        silence = np.zeros(self._out_size, dtype=self.model.input_dtype)
+        for _ in range(WARMUP_RUNS):
+            self.model.predict(silence, self.config.output_rate)
+        self.model.reset_states()
+
+    def _alloc_buffers(self):
+        """(Re)allocate the input ring and float buffer for the input chunk size."""
+        size = self.config.input_chunk_size
+        self.audio_ring = AudioRing(RING_SLOTS, size, self.config.max_batch, MAX_LAG_CHUNKS)
+        # float32 input for --no-degrade, converted in one cast-and-scale pass
+        self._float_buf = np.empty(self.config.max_batch * size, dtype=np.float32)
+
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """PyAudio callback - runs in separate thread."""
-        self.audio_queue.put(in_data)
+        self.audio_ring.push(in_data)
         return (None, pyaudio.paContinue)
 
     def _process_audio(self):
         """Main processing loop."""
+        raise_thread_priority()
         chunk_times: collections.deque = collections.deque(maxlen=100)
-
-        while self.running:
-            try:
-                raw_audio = self.audio_queue.get(timeout=0.1)
-            except queue.Empty:
-                continue
+        ring = self.audio_ring
+        max_batch = self.config.max_batch
+        process_chunk = self._process_chunk
+        lost = 0
+
+        while True:
+            # Sleep until a chunk arrives, then take any backlog up to
+            # max_batch; the ring is closed on shutdown
+            chunks = ring.peek(max_batch)
+            if chunks is None:
+                break
+            if ring.skipped + ring.dropped != lost:
+                # Count lost chunks as elapsed audio so VAD timestamps stay
+                # on wall-clock time
+                self.vad.current_sample += (ring.skipped + ring.dropped - lost) * self._out_size
+                lost = ring.skipped + ring.dropped
 
             start_time = time.perf_counter()
+            n_chunks = len(chunks)
+            pcm = chunks.ravel()
 
-            # Convert to float32
-            audio = np.frombuffer(raw_audio, dtype=np.int16).astype(np.float32)
-            audio = audio / 32768.0  # Normalize to [-1, 1]
-
-            # Apply phone degradation
+            # Convert to float32 in [-1, 1] and apply phone degradation
+            # (fused into one pass with numba; filter state carries across)
             if self.degrade_audio:
-                audio = self.phone_sim.degrade(audio)
-
-            # Ensure correct chunk size for VAD (256 samples at 8kHz)
-            expected_size = self.config.output_chunk_size
-            if len(audio) != expected_size:
-                if len(audio) > expected_size:
-                    audio = audio[:expected_size]
-                else:
-                    audio = np.pad(audio, (0, expected_size - len(audio)))
-
-            # Run VAD
-            chunk_tensor = torch.FloatTensor(audio)
-            result = self.vad(chunk_tensor, return_seconds=True)
-
-            # Get raw probability for visualization
-            prob = self.model(chunk_tensor.unsqueeze(0), self.config.output_rate).item()
-
-            # Process result
-            self._handle_vad_result(result, prob, audio)
+                audio = self.phone_sim.degrade_pcm(pcm)
+            elif self._pcm_model:
+                audio = pcm
+            else:
+                audio = np.multiply(pcm, INT16_SCALE, out=self._float_buf[:pcm.size],
+                                    casting='unsafe')
+
+            # The model keeps recurrent state across consecutive windows, so
+            # chunks still go through it one at a time, in order
+            for chunk in np.array_split(audio, n_chunks):
+                process_chunk(chunk)
+            ring.release(n_chunks)
 
             # Track processing time
             elapsed = (time.perf_counter() - start_time) * 1000
-            chunk_times.append(elapsed)
+            chunk_times.extend([elapsed / n_chunks] * n_chunks)
 
             # Periodic stats
             if len(chunk_times) == 100:
                 avg_ms = sum(chunk_times) / len(chunk_times)
                 if avg_ms > 5:  # Only warn if slow
-                    print(f"  [perf] Avg processing: {avg_ms:.1f}ms per chunk")
+                    self._messages.append(f"  [perf] Avg processing: {avg_ms:.1f}ms per chunk\n")
+
+    def _process_chunk(self, audio: np.ndarray):
+        """Run VAD on one output-rate chunk and handle the result."""
+        # Ensure correct chunk size for VAD (256 samples at 8kHz)
+        expected_size = self._out_size
+        n = len(audio)
+        if n > expected_size:
+            audio = audio[:expected_size]
+        elif n < expected_size:
+            # Zero-pad into a reused buffer rather than allocating via np.pad
+            scratch = self._chunk_scratch
+            scratch[:n] = audio
+            scratch[n:] = 0.0
+            audio = scratch
+
+        # Run VAD (single model call; probability cached for the meter)
+        result = self.vad(audio, return_seconds=True)
+        prob = self.vad.probability
+
+        # Process result
+        self._handle_vad_result(result, prob, audio)
 
     def _handle_vad_result(self, result: dict | None, prob: float, audio: np.ndarray):
-        """Handle VAD events and update display."""
-        # Visual probability meter
-        bar_len = int(prob * 30)
-        bar = "█" * bar_len + "░" * (30 - bar_len)
-        state = "🎤 SPEECH" if self.is_speaking else "   silent"
-
+        """Handle VAD events and publish state for the display thread."""
         # Update state based on VAD result
         if result is not None:
             if 'start' in result:
                 self.is_speaking = True
                 self.speech_start_time = time.time()
-                self.speech_buffer = [audio]
+                self._speech_write = 0
+                self._store_speech(audio)
                 self.total_speech_chunks = 1
-                print(f"\n{'='*60}")
-                print(f"🎙️  SPEECH STARTED at {result['start']:.2f}s")
-                print(f"{'='*60}")
+                self._messages.append(
+                    f"\n{'='*60}\n"
+                    f"🎙️  SPEECH STARTED at {result['start']:.2f}s\n"
+                    f"{'='*60}\n"
+                )
 
             elif 'end' in result:
                 duration = time.time() - self.speech_start_time if self.speech_start_time else 0
                 self.is_speaking = False
-                print(f"\n{'='*60}")
-                print(f"🔇 SPEECH ENDED at {result['end']:.2f}s")
-                print(f"   Duration: {duration:.2f}s ({self.total_speech_chunks} chunks)")
-                print(f"{'='*60}\n")
-                self.speech_buffer = []
+                self._messages.append(
+                    f"\n{'='*60}\n"
+                    f"🔇 SPEECH ENDED at {result['end']:.2f}s\n"
+                    f"   Duration: {duration:.2f}s ({self.total_speech_chunks} chunks)\n"
+                    f"{'='*60}\n\n"
+                )
                 self.speech_start_time = None
 
         elif self.is_speaking:
-            self.speech_buffer.append(audio)
+            self._store_speech(audio)
             self.total_speech_chunks += 1
 
-        # Real-time display (overwrite line)
-        sys.stdout.write(f"\r{state} |{bar}| {prob:.2f}  ")
-        sys.stdout.flush()
+        self._display_state = (prob, self.is_speaking)
+
+    def _store_speech(self, audio: np.ndarray):
+        if self._speech_write < MAX_SPEECH_CHUNKS:
+            row = self._speech_chunks[self._speech_write]
+            if audio.dtype == np.int16:
+                np.multiply(audio, INT16_SCALE, out=row, casting='unsafe')
+            else:
+                row[:] = audio
+            self._speech_write += 1
+
+    @property
+    def speech_audio(self) -> np.ndarray:
+        """Audio of the current or last utterance (first 60 s), as one contiguous array."""
+        return self._speech_chunks[:self._speech_write].ravel()
+
+    def _display_loop(self):
+        """Redraw the meter and print messages until processing stops."""
+        while self.running:
+            self._render()
+            time.sleep(DISPLAY_INTERVAL)
+
+    def _render(self):
+        """Print pending messages, then overwrite the meter line if it changed."""
+        printed = bool(self._messages)
+        while self._messages:
+            sys.stdout.write(self._messages.popleft())
+        prob, speaking = self._display_state
+        state = "🎤 SPEECH" if speaking else "   silent"
+        bar = _METER_BARS[int(prob * METER_WIDTH)]
+        line = f"\r{state} |{bar}| {prob:.2f}  "
+        if printed or line != self._meter_line:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            self._meter_line = line
 
     def list_devices(self):
         """List available audio input devices."""
@@ -184,7 +461,8 @@ class StreamingVADTester:
             print(f"Note: Device sample rate is {actual_rate}Hz, adjusting...")
             self.config.input_rate = actual_rate
             if self.degrade_audio:
-                self.phone_sim = PhoneAudioSimulator(actual_rate, self.config.output_rate)
+                self.phone_sim.update_rate(actual_rate)
+            self._alloc_buffers()
 
         print(f"\nUsing device [{device_index}]: {device_info['name']}")
         print(f"Input: {self.config.input_rate}Hz → Output: {self.config.output_rate}Hz (phone quality)")
@@ -209,9 +487,12 @@ class StreamingVADTester:
         self.running = True
         stream.start_stream()
 
-        # Start processing thread
-        process_thread = threading.Thread(target=self._process_audio)
+        # Start processing and (terminal) display threads
+        process_thread = threading.Thread(target=self._process_audio, name='vad-process')
+        display_thread = threading.Thread(target=self._display_loop, name='vad-display',
+                                          daemon=True)
         process_thread.start()
+        display_thread.start()
 
         try:
             while stream.is_active():
@@ -220,9 +501,16 @@ class StreamingVADTester:
             print("\n\nStopping...")
         finally:
             self.running = False
+            self.audio_ring.close()
             stream.stop_stream()
             stream.close()
             process_thread.join()
+            display_thread.join()
+            self._render()  # anything posted after the last refresh
             self.pa.terminate()
 
+        lost = self.audio_ring.dropped + self.audio_ring.skipped
+        if lost:
+            print(f"Dropped {lost} chunks (processing fell behind)")
+
         print("Done.")